@@ -9,6 +9,9 @@ generate wanted shoe files. In the execution JSON file, the following values are
 "site" : Web directory of shoe brand site to use. For example, Air Jordan 1 would be "air-jordans/air-jordan-1". So
 if you appended this to "flightclub.com/", you'd get to the Air Jordan 1 catalog page.
 
+"sites" : List of sites, may be given instead of "site" to generate files for several catalog pages in one run. Shoe
+files are numbered continuously across all of them.
+
 "dir" : Directory to place generated shoe files in.
 
 "exclude_list" : List of exclude tags strings. Exclude tags are strings to look for in shoe names. If an exclude tag is
@@ -16,6 +19,11 @@ found in a shoe name, that shoe will not have a file generated for it. For examp
 the shoe will be skipped. Note that this is case insensitive.
 
 "start" : Starting file number.
+
+The following values are optional:
+
+"output_mode" : "files" (default) to write one X.json file per shoe, or "jsonl" to write every shoe as a line of a
+single shoes.jsonl file in "dir" (replaced on every run).
 """
 import globals
 import shoepair
@@ -24,22 +32,130 @@ import ast
 import re
 import requests
 import json
-from bs4 import BeautifulSoup as BSoup
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from splinter import Browser
+
+# Use orjson for (de)serializing if it's installed, it's a lot faster than the standard json module. Either way
+# _dumps returns compact UTF-8 bytes, and decode errors are json.JSONDecodeError (orjson's subclasses it).
+try:
+    import orjson
+
+    _loads = orjson.loads
+    _dumps = orjson.dumps
+except ImportError:
+    _loads = json.loads
+
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+# Shared session so repeated execute() calls reuse the same keep-alive connections to Flight Club
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+# Matches the 'impressions' list inside the catalog page <script>
+_IMPRESSIONS_RE = re.compile(r"'impressions': \[(.*?)\]")
+OUTPUT_MODES = ("files", "jsonl")
+JSONL_FILE_NAME = "shoes.jsonl"
+# Scraped shoes (id -> [name, image URL]), kept on disk so reruns don't scrape the same shoe again
+_CACHE_PATH = ".gys_cache.json"
+_cache = None
+
+
+def load_cache() -> dict:
+    """
+    Load the scraped shoe cache from disk. Only read once, later calls return the same dict.
+    :return: Cache dict, mapping shoe id to [name, image URL]. Empty if there is no cache file yet.
+    """
+    global _cache
+    if _cache is None:
+        try:
+            with open(_CACHE_PATH, "rb") as file:
+                _cache = _loads(file.read())
+        except (OSError, json.JSONDecodeError):
+            _cache = {}
+    return _cache
+
+
+def save_cache() -> None:
+    """
+    Write the scraped shoe cache to disk, if it was loaded.
+    :return: Nothing.
+    """
+    if _cache is not None:
+        with open(_CACHE_PATH, "wb") as file:
+            file.write(_dumps(_cache))
 
 
-def create_shoe_pair(idobj, excludetags: list) -> shoepair.ShoePair:
+def create_shoe_pair(idobj, excludetags: re.Pattern, get_browser=None) -> shoepair.ShoePair:
     """
     Create a ShoePair object, excluding any shoes that contain any exclude tags.
     :param idobj: A shoe object in the impressions list. Must contain "name" value.
-    :param excludetags: Shoes to exclude based on if they contain a given string.
-    :return: ShoePair if not excluded, None otherwise.
+    :param excludetags: Compiled exclude tag pattern, or None to exclude nothing. See compile_exclude_tags.
+    :param get_browser: Function returning a browser to reuse if one is needed. See ShoePair.
+    :return: ShoePair if not excluded, None otherwise. Shoes already in the cache are not scraped again.
     """
     name = idobj["name"]
-    for etag in excludetags:
-        if re.search(etag, name, re.IGNORECASE):
-            globals.print_info("Excluding '{}', found with tag {}".format(name, etag))
+    if excludetags is not None:
+        found = excludetags.search(name)
+        if found:
+            globals.print_info("Excluding '{}', found with tag {}".format(name, found.group(0)))
             return None
-    return shoepair.ShoePair(idobj["id"], excludetags)
+    cache = load_cache()
+    cached = cache.get(idobj["id"])
+    if cached is not None:
+        return shoepair.ShoePair.from_page(shoepair.ShoePage(*cached))
+    pair = shoepair.ShoePair(idobj["id"], session=_SESSION, get_browser=get_browser) # Tags were already checked above
+    if pair.is_scraped: # Don't cache failures, so they are retried next time
+        cache[idobj["id"]] = [pair.name, pair.image]
+    return pair
+
+
+def compile_exclude_tags(excludetags: list) -> re.Pattern:
+    """
+    Combine exclude tags into one case insensitive pattern, so each shoe name is only scanned once.
+    :param excludetags: Exclude tag strings. Matched literally.
+    :return: Compiled pattern, or None if there are no exclude tags.
+    """
+    if not excludetags:
+        return None
+    return re.compile("|".join(re.escape(etag) for etag in excludetags), re.IGNORECASE)
+
+
+def scrape_all(shoelist: list, excludetags: list=[]):
+    """
+    Scrape every shoe in the list concurrently.
+    :param shoelist: List of shoe IDs.
+    :param excludetags: Exclude tags. See compile_exclude_tags.
+    :return: Generator of ShoePairs, in shoelist order. Excluded shoes are skipped.
+    """
+    exclude_pattern = compile_exclude_tags(excludetags)
+    load_cache() # Before any worker threads need it
+    # Browsers are only needed for pages that can't be scraped with plain requests. Each worker thread starts its own
+    # the first time one is needed, which is then shared by every shoe that thread scrapes.
+    local = threading.local()
+    browsers = []
+
+    def get_browser() -> Browser:
+        if not hasattr(local, "browser"):
+            local.browser = shoepair.new_browser()
+            browsers.append(local.browser)
+        return local.browser
+
+    def scrape(shoe):
+        return create_shoe_pair(shoe, exclude_pattern, get_browser)
+
+    try:
+        with ThreadPoolExecutor(max_workers=globals.SCRAPE_WORKERS) as executor:
+            # map() yields in shoelist order, so file numbers stay deterministic
+            for pair in executor.map(scrape, shoelist):
+                if pair is not None:
+                    yield pair
+    finally:
+        for browser in browsers:
+            browser.quit()
+        save_cache()
 
 
 def create_all_files(directory: str, shoelist: list, excludetags: list=[], startnum: int = 1) -> int:
@@ -50,20 +166,55 @@ def create_all_files(directory: str, shoelist: list, excludetags: list=[], start
     - Where X is an integer starting from 1.
     :param directory: Directory to write files to.
     :param shoelist: List of shoe IDs.
-    :param excludetags: Exclude tags. See ShoePair.
+    :param excludetags: Exclude tags. See compile_exclude_tags.
     :param startnum: Starting file number.
     :return: Last file number used.
     """
     current_filenum = startnum - 1 # Starting file number
-    for shoe in shoelist:
-        shoepair = create_shoe_pair(shoe, excludetags)
-        if shoepair is not None:
+    created = [] # Messages are printed once at the end, rather than once per file
+    try:
+        for pair in scrape_all(shoelist, excludetags):
             current_filenum += 1 # Increment to next file
-            create_file(directory, str(current_filenum), shoepair.get_name, shoepair.get_image)
-            globals.print_info("Created file {}.json".format(current_filenum))
+            create_file(directory, str(current_filenum), pair.name, pair.image)
+            created.append("Created file {}.json: {} ({})".format(current_filenum, pair.name, pair.image))
+    finally: # Report what was written, even if the run stopped partway
+        if created:
+            globals.print_info("\n".join(created))
     return current_filenum
 
 
+def create_all_files_consolidated(directory: str, shoelist: list, excludetags: list=[], startnum: int = 1) -> int:
+    """
+    Write every shoe in the given list to a single JSON lines file, rather than one file per shoe.
+
+    The file is named shoes.jsonl, and each line has the same format as an X.json file. An existing file is replaced,
+    so reruns don't duplicate shoes. It is only replaced once every shoe has been written (to a temporary file first),
+    so a failed run or an empty list leaves it untouched.
+    :param directory: Directory to write the file to.
+    :param shoelist: List of shoe IDs.
+    :param excludetags: Exclude tags. See compile_exclude_tags.
+    :param startnum: Starting shoe number. Only used to count shoes, so the return value matches create_all_files.
+    :return: Last shoe number used.
+    """
+    current_num = startnum - 1
+    if len(shoelist) == 0: # Nothing to write, keep the existing file
+        return current_num
+    path = os.path.join(directory, JSONL_FILE_NAME)
+    temp_path = path + ".tmp"
+    try:
+        with open(temp_path, "wb", buffering=1 << 16) as file:
+            for pair in scrape_all(shoelist, excludetags):
+                current_num += 1
+                file.write(_dumps({"name": pair.name, "img": pair.image}))
+                file.write(b"\n")
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path): # Wasn't moved into place, the run failed
+            os.remove(temp_path)
+    globals.print_info("Wrote {} shoes to {}".format(current_num - startnum + 1, path))
+    return current_num
+
+
 def create_file(dname: str, name: str, shoename: str, imgval: str) -> None:
     """
     Create a new file.
@@ -73,48 +224,50 @@ def create_file(dname: str, name: str, shoename: str, imgval: str) -> None:
     :param imgval: URL of the shoe image.
     :return: Nothing.
     """
-    file = open(dname + name + ".json", "w+")
-    file.write(json.dumps({"name": shoename, "img": imgval}))
-    file.close()
+    with open(os.path.join(dname, name + ".json"), "wb", buffering=65536) as file:
+        file.write(_dumps({"name": shoename, "img": imgval}))
 
 
-def get_impressions_list(bsoup : BSoup):
+def get_impressions_list(site: str) -> list:
     """
-    Get the list from 'impressions' (located in the <script>).
-    :param bsoup:
+    Get the list from 'impressions' (located in the <script>) of a catalog page.
+
+    The regex is run directly over the page HTML, no parse tree is built.
+    :param site: URL of the catalog page.
     :return: The found list. If not found, will return a list
      with an object {"name": "NULL"}.
     """
-    regex = re.compile("\'impressions\': \[(.*?)\]")
-    script_tag = bsoup.find("script", text=regex)
-    if script_tag: # Found?
-        part = regex.search(script_tag.text)
-        if part: # Found?
-            globals.print_info("Found impressions list: " + part.group(1))
-            return json.loads("[" + part.group(1) + "]")
+    req = _SESSION.get(site, timeout=30)
+    req.raise_for_status()
+    part = _IMPRESSIONS_RE.search(req.text)
+    if part: # Found?
+        globals.print_info("Found impressions list: " + part.group(1))
+        return _loads("[" + part.group(1) + "]")
     return [{"name": "NULL"}]
 
 
-def create_execution_file(name: str, site: str, dir: str, exclude_list: list, start: int) -> None:
+def create_execution_file(name: str, site, dir: str, exclude_list: list, start: int,
+                          output_mode: str = "files") -> None:
     """
     Create an execution JSON file. This file is read and used to generate shoe files.
     :param name: Name of generation file.
-    :param site: Directory of flightclub.com to use.
+    :param site: Directory of flightclub.com to use, or a list of them (written as "sites").
     :param dir: Directory to place shoe files.
     :param exclude_list: List of exclude tags.
     :param start: Starting file number.
+    :param output_mode: "files" or "jsonl". See OUTPUT_MODES.
     :return: Nothing.
     """
-    file = open(name, "w")
-    json.dump(
+    file = open(name, "wb")
+    file.write(_dumps(
         {
-            "site": site,
+            "sites" if isinstance(site, list) else "site": site,
             "dir": dir,
             "exclude_list": exclude_list,
-            "start": start
-        },
-        file
-    )
+            "start": start,
+            "output_mode": output_mode
+        }
+    ))
     file.close()
 
 
@@ -126,14 +279,19 @@ def read_execution_file(path: str) -> [str, dict]:
      as missing required values. Loaded is a dict that was loaded from the JSON, it will be None if an error string
      other than an empty string is given.
     """
-    file = open(path)
-    loaded = json.loads(file.read())
+    file = open(path, "rb")
+    loaded = _loads(file.read())
     print("Loaded JSON: ", loaded)
     file.close()
 
     if isinstance(loaded, dict):
         # Check for required values
-        if "site" not in loaded:
+        if "sites" in loaded:
+            if not isinstance(loaded["sites"], list):
+                return "sites value should be a list", None
+        elif "site" in loaded:
+            loaded["sites"] = [loaded["site"]] # Always generate from a list of sites
+        else:
             return "Missing site value", None
         if "dir" not in loaded:
             return "Missing dir value", None
@@ -141,6 +299,8 @@ def read_execution_file(path: str) -> [str, dict]:
             return "Missing exclude_list value", None
         if "start" not in loaded:
             return "Missing start value", None
+        if loaded.setdefault("output_mode", "files") not in OUTPUT_MODES:
+            return "output_mode should be one of {}".format(OUTPUT_MODES), None
     else: # Is not a dictionary!
         return "Loaded JSON should be a dict ( {} )!", None
     # Success
@@ -170,7 +330,10 @@ def prompt_execution_values() -> None:
     except TypeError:
         globals.print_warn("Invalid value, defaulting to 1")
         start = 1
-    create_execution_file(ej_name, site, dir, exclude_list, start)
+    output_mode = "files"
+    if str(input("Write all shoes to a single " + JSONL_FILE_NAME + " file? [y/N]: ")) == "y":
+        output_mode = "jsonl"
+    create_execution_file(ej_name, site, dir, exclude_list, start, output_mode)
 
 
 def execute(expath: str = None) -> [int, bool]:
@@ -180,34 +343,43 @@ def execute(expath: str = None) -> [int, bool]:
     :return: Last file number generated & True on successful execution, False otherwise.
     """
     print("Guess Your Sneaker File Generator.")
-    # Ask to create execution file if expath isn't given already
-    gen_json = False
-    if expath is None:
-        gen_json = False if str(input("Create execution JSON file? [y/N]: ")) != "y" else True
-
+    interactive = expath is None
     loaded = None
-    if gen_json:
-        # Create new execution file
-        prompt_execution_values()
-        execute()
-    else:
+    while loaded is None:
+        # Ask to create execution file if expath isn't given already
+        if interactive and str(input("Create execution JSON file? [y/N]: ")) == "y":
+            # Create new execution file, then ask again
+            prompt_execution_values()
+            continue
         # Load execution JSON file
         try:
-            if expath is None:
+            if interactive:
                 expath = str(input("Path to execution JSON: "))
             err, loaded = read_execution_file(expath)
             if err != "":
                 print("Error with execution JSON: ", err)
-                return False
         except json.JSONDecodeError as je:
             print("JSON Decode Error: ", je)
+        if loaded is None and not interactive: # Can't ask for another file
             return False
 
-    # Get the given shoe brand site
-    globals.print_info("Retrieving site...")
-    req = requests.get(loaded["site"])
-    req.raise_for_status()
-    list_soup = BSoup(req.text, "html.parser")
+    # Get the given shoe brand sites, generating from all of them at once shares the scraping setup between them
+    impressions = []
+    for site in loaded["sites"]:
+        globals.print_info("Retrieving site {}...".format(site))
+        try:
+            found = get_impressions_list(site)
+        except (requests.RequestException, json.JSONDecodeError) as err:
+            globals.print_warn("Skipping site {}, could not retrieve it: {}".format(site, err))
+            continue
+        if found == [{"name": "NULL"}]: # Not found, don't pass the placeholder on as a shoe
+            globals.print_warn("Skipping site {}, no impressions list found".format(site))
+            continue
+        impressions.extend(found)
+    if len(impressions) == 0: # No site could be read, nothing to generate
+        print("Error: no shoes found on any site")
+        return False
     globals.print_info("Starting generation...")
-    lf = create_all_files(str(loaded["dir"]), get_impressions_list(list_soup), loaded["exclude_list"], loaded["start"])
+    create = create_all_files_consolidated if loaded["output_mode"] == "jsonl" else create_all_files
+    lf = create(str(loaded["dir"]), impressions, loaded["exclude_list"], loaded["start"])
     return [lf, True]
@@ -4,16 +4,26 @@ NULL_IMAGE_STRING = "NoImageURLFound"
 BASE_SITE = "https://www.flightclub.com"
 BASE_SEARCH_SITE = BASE_SITE + "/catalogsearch/result/?q="
 PRINT_INFO = True
+SCRAPE_WORKERS = 8 # Number of shoes scraped concurrently (one browser each)
 
 
-def print_info(output):
-    """
-    Print info message.
-    :param output: Message.
-    :return:
-    """
-    if PRINT_INFO:
+# PRINT_INFO is checked once here rather than on every call
+if PRINT_INFO:
+    def print_info(output):
+        """
+        Print info message.
+        :param output: Message.
+        :return:
+        """
         print("-[---]- INFO: ", output, " -[---]-")
+else:
+    def print_info(output):
+        """
+        Print info message (disabled, does nothing).
+        :param output: Message.
+        :return:
+        """
+        pass
 
 
 def print_warn(output):
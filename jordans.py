@@ -23,15 +23,15 @@ except ...:
 
 JORDANS_SITE = "https://www.flightclub.com/air-jordans/air-jordan-{}"
 
-# Recursive generation
+# Generate all brands in a single run
 last_file_number = int(input("Starting file #: "))
-for brand_num in range(min_jordans, max_jordans + 1):
-    globals.print_info("Preparing to generate next shoe files for Air Jordans {}".format(brand_num))
-    # Update execution file to generate new files
-    generator.create_execution_file(name=path,
-                                    site=JORDANS_SITE.format(brand_num),
-                                    start=last_file_number,
-                                    dir=str(loaded["dir"]),
-                                    exclude_list=loaded["exclude_list"])
-    last_file_number, success = generator.execute(path)
-    last_file_number += 1 # Reflect next file number to start with for next generation
+globals.print_info("Preparing to generate shoe files for Air Jordans {} to {}".format(min_jordans, max_jordans))
+# Update execution file to generate new files
+generator.create_execution_file(name=path,
+                                site=[JORDANS_SITE.format(brand_num)
+                                      for brand_num in range(min_jordans, max_jordans + 1)],
+                                start=last_file_number,
+                                dir=str(loaded["dir"]),
+                                exclude_list=loaded["exclude_list"],
+                                output_mode=loaded["output_mode"])
+last_file_number, success = generator.execute(path)
@@ -1,117 +1,163 @@
 import globals
-from bs4 import BeautifulSoup as BSoup
+import requests
+from collections import namedtuple
+from urllib.parse import urljoin
+from lxml import etree
+from lxml import html as lxml_html
 from splinter import Browser
 
+# Name and image URL scraped from a shoe page
+ShoePage = namedtuple("ShoePage", ["name", "img"])
+# Firefox preferences for scraping, nothing needs to be rendered (2 = block)
+BROWSER_PREFERENCES = {
+    "permissions.default.image": 2,
+    "permissions.default.stylesheet": 2
+}
+
+
+def new_browser(headless: bool = True) -> Browser:
+    """
+    Start a Firefox browser for scraping, with images and stylesheets disabled.
+    :param headless: Browse headless?
+    :return: Browser object.
+    """
+    return Browser("firefox", headless=headless, profile_preferences=BROWSER_PREFERENCES)
+
 
 class ShoePair:
     """
     Final shoe name and image URL object.
+
+    The shoe name and image URL are the public name and image attributes.
     """
-    _excluded = False
-    _name = ""
-    _image = ""
+    __slots__ = ("name", "image")
 
-    def __init__(self, id: str, excludetags: list=[]):
+    def __init__(self, id: str, session: requests.Session = None, get_browser=None):
         """
         Find the name and image of a shoe.
-        :param id: Shoe ID (found in shoe list).
-        :param excludetags: Filter out shoes that contain a string (tag).
-        """
-        brow = self._search(id)
-        self._name = self._get_shoe_name(brow)
-        self._image = self._get_shoe_image(brow)
-        globals.print_info("Constructed shoe with \nName: {}\nImg URL: {}".format(self._name, self._image))
 
-        brow.quit()
+        Pages are fetched with plain HTTP requests. A browser is only used if the shoe could not be found that way
+        (e.g. the page needs JavaScript).
+        :param id: Shoe ID (found in shoe list).
+        :param session: Requests session to fetch pages with. If None, requests are made without a session.
+        :param get_browser: Function returning a browser to reuse if a browser is needed. If None, a browser is
+         started and quit for this shoe only.
+        """
+        page = self._search(id, session if session is not None else requests)
+        if page is None: # Fall back to a real browser
+            globals.print_info("Could not scrape {} without a browser, retrying with one".format(id))
+            page = self._browser_search(id, get_browser)
+        self.name, self.image = page
 
-    @property
-    def is_excluded(self) -> bool:
+    @classmethod
+    def from_page(cls, page: ShoePage) -> "ShoePair":
         """
-        Is it excluded? (Filtered through excludetags, meaning img was not looked for)
-        :return: True if excluded, False otherwise.
+        Create a ShoePair from an already scraped name and image, without searching (e.g. from a cache).
+        :param page: ShoePage of the shoe.
+        :return: ShoePair object.
         """
-        return self._excluded
+        pair = cls.__new__(cls)
+        pair.name, pair.image = page
+        return pair
 
     @property
-    def get_name(self) -> str:
+    def is_scraped(self) -> bool:
         """
-        Get the name of the shoe.
-        :return: Shoe name string.
+        Were both the name and the image found?
+        :return: True if both were found, False otherwise.
         """
-        return self._name
+        return self.name != globals.NULL_NAME_STRING and self.image != globals.NULL_IMAGE_STRING
 
-    @property
-    def get_image(self) -> str:
+    @staticmethod
+    def _search(id: str, session) -> ShoePage:
         """
-        Get the image URL.
-        :return: Image URL string.
+        'Search' for the shoe and scrape the first result data (should be accurate due to the fact that it searches by
+        id), using plain HTTP requests.
+        :param id: In a shoe object given by the 'impressions' list, the 'id' value.
+        :param session: Requests session (or the requests module) to fetch pages with.
+        :return: ShoePage of the shoe, or None if the shoe page could not be found, fetched (e.g. blocked with a
+         403/503) or scraped.
+        """
+        try:
+            search = session.get(globals.BASE_SEARCH_SITE + id, timeout=30)
+            search.raise_for_status()
+            href = ShoePair._find_shoe_link(search.content, search.url, id)
+            if href is None:
+                return None
+            product = session.get(href, timeout=30)
+            product.raise_for_status()
+            tree = lxml_html.fromstring(product.content)
+        except requests.RequestException as err:
+            globals.print_warn("Could not fetch {} without a browser: {}".format(id, err))
+            return None
+        except (etree.ParserError, ValueError) as err: # E.g. an empty page
+            globals.print_warn("Could not parse {} without a browser: {}".format(id, err))
+            return None
+        page = ShoePage(ShoePair._get_shoe_name(tree), ShoePair._get_shoe_image(tree))
+        if page == (globals.NULL_NAME_STRING, globals.NULL_IMAGE_STRING):
+            return None
+        return page
+
+    def _browser_search(self, id: str, get_browser=None) -> ShoePage:
         """
-        return self._image
+        Same as _search, but drives a browser. Slower, but works for pages that need JavaScript.
+        :param id: In a shoe object given by the 'impressions' list, the 'id' value.
+        :param get_browser: Function returning a browser to use. If None, a browser is started and quit here.
+        :return: ShoePage of the shoe. Has the NULL name and image strings if a page could not be parsed.
+        """
+        browser = new_browser() if get_browser is None else get_browser()
+        try:
+            tree = lxml_html.fromstring(self._visit_shoe_page(id, browser).html)
+            return ShoePage(self._get_shoe_name(tree), self._get_shoe_image(tree))
+        except (etree.ParserError, ValueError) as err: # E.g. an empty page
+            globals.print_warn("Could not parse {}: {}".format(id, err))
+            return ShoePage(globals.NULL_NAME_STRING, globals.NULL_IMAGE_STRING)
+        finally:
+            if get_browser is None:
+                browser.quit()
 
     @staticmethod
-    def _search(id: str, headless=False) -> Browser:
+    def _visit_shoe_page(id: str, browser: Browser) -> Browser:
         """
-        'Search' for the shoe and scrape the first result data (should be accurate due to the fact that it searches by
-        id).
+        Visit the search page, then the first result with the shoe id in its link.
         :param id: In a shoe object given by the 'impressions' list, the 'id' value.
-        :param webdriver: WebDriver to use. Default is firefox.
-        :param headless: Browse headless?
-        :return: Browser object with current link at the shoe page.
+        :param browser: Browser to visit the pages with.
+        :return: Given browser, with current link at the shoe page.
         """
-        # Search
-        globals.print_info("Searching for {}".format(id))
-        browser = Browser(headless=headless) # Defaults to firefox
         browser.visit(globals.BASE_SEARCH_SITE + id)
-        bes = BSoup(browser.html, "html.parser")
-        a_elements = bes.find_all("a")
-        for aelem in a_elements:
-            if "-" + id in aelem["href"]:
-                nbrowser = Browser(headless=headless)
-                nbrowser.visit(aelem["href"])
-                browser.quit()
-                return nbrowser
+        href = ShoePair._find_shoe_link(browser.html, browser.url, id)
+        if href is not None:
+            browser.visit(href)
         return browser
 
     @staticmethod
-    def _evaluate_soup_select(beautiful: BSoup, tag: str):
+    def _find_shoe_link(html: str, url: str, id: str) -> str:
         """
-        BeautifulSoup select and evaluate whether the returned length is != 0.
-
-        Example: BeautifulSoup.select('a')
-        :param beautiful: BeautifulSoup object to use.
-        :param tag: Selector string. E.g. 'a[class='xy']'
-        :return: The first element of select(), otherwise None.
+        Find the first link to the shoe page in a search page.
+        :param html: Search page HTML (str or bytes).
+        :param url: URL of the search page (after any redirects), relative links are resolved against it.
+        :param id: In a shoe object given by the 'impressions' list, the 'id' value.
+        :return: The absolute link (href) with the shoe id in it, or None if there is none.
         """
-        elem = beautiful.select(tag)
-        if len(elem) == 0:
-            return None
-        return elem[0]
-
-    # NOTE: It just works if you create a new BeautifulSoup object rather than sharing one... Just leave it.
+        hrefs = lxml_html.fromstring(html).xpath("//a[contains(@href, $needle)]/@href", needle="-" + id)
+        return None if len(hrefs) == 0 else urljoin(url, hrefs[0])
 
     @staticmethod
-    def _get_shoe_image(bs: Browser) -> str:
+    def _get_shoe_image(tree) -> str:
         """
         Get the image of the shoe.
-        :param bes: Browser to use.
+        :param tree: Parsed (lxml) shoe page.
         :return: Shoe image URL.
         """
-        soup = BSoup(bs.html, "html.parser")
-        elem = ShoePair._evaluate_soup_select(soup,
-                                              "div[class='product-image product-img-box'] > img[class='product-img']")
-        ret_str = globals.NULL_IMAGE_STRING if elem is None else elem["src"]
-        soup.decompose() # Destroy
-        return ret_str
+        imgs = tree.xpath("//div[@class='product-image product-img-box']/img[@class='product-img']/@src")
+        return globals.NULL_IMAGE_STRING if len(imgs) == 0 else imgs[0]
 
     @staticmethod
-    def _get_shoe_name(bs: Browser) -> str:
+    def _get_shoe_name(tree) -> str:
         """
         Get the shoe name.
-        :param bs: Browser to use.
+        :param tree: Parsed (lxml) shoe page.
         :return: Name of shoe.
         """
-        soup = BSoup(bs.html, "html.parser")
-        sel_element = ShoePair._evaluate_soup_select(soup, "div[class='mb-padding product-name hidden-phone'] > h1")
-        ret_str = globals.NULL_NAME_STRING if sel_element is None else sel_element.text
-        soup.decompose()
-        return ret_str
+        names = tree.xpath("//div[@class='mb-padding product-name hidden-phone']/h1")
+        return globals.NULL_NAME_STRING if len(names) == 0 else names[0].text_content()